@@ -1,42 +1,54 @@
 # dags/weather_ingestion_hourly.py
 from __future__ import annotations
 
+import asyncio
+import logging
 from datetime import timedelta
 from typing import Any, Dict, List
 
 from airflow import DAG
 from airflow.decorators import dag, task
-from airflow.models import Variable
 from airflow.utils.dates import days_ago
 
 from weather_pipeline.config import (
     get_api_key_from_env_or_airflow,
     get_postgres_conninfo_from_airflow,
+    get_variable,
     DEFAULT_ENDPOINT,
     DEFAULT_UNITS,
 )
-from weather_pipeline.extract import fetch_current_weather
-from weather_pipeline.transform import normalize_current_weather_payload
+from weather_pipeline.extract import fetch_many
+from weather_pipeline.ratelimit import set_openweather_workers
 from weather_pipeline.load import (
     pg_fetch_active_locations,
-    pg_insert_raw_response,
-    pg_upsert_weather_observation,
+    pg_ensure_raw_partitions,
+    pg_bulk_insert_raw_and_upsert,
     pg_refresh_latest,
-    pg_dq_freshness_and_rowcount,
+    pg_dq_observation_freshness,
+    pg_dq_latest_rowcount,
 )
 
+log = logging.getLogger(__name__)
+
+
+def _parallelism() -> int:
+    return max(1, int(get_variable("WEATHER_PARALLELISM", "8")))
+
 
 @dag(
     dag_id="weather_ingestion_hourly",
     start_date=days_ago(2),
-    schedule="0 * * * *",  # hourly
+    # Micro-batches: each run only polls locations whose next_poll_at is due. next_poll_at is set from the
+    # run's scheduled tick, so a location with the default 1-hour poll_interval is polled every 12th tick.
+    schedule="*/5 * * * *",
     catchup=False,
+    max_active_runs=1,
     default_args={
         "owner": "data-eng",
-        "retries": 3,
-        "retry_delay": timedelta(minutes=5),
-        "retry_exponential_backoff": True,
-        "max_retry_delay": timedelta(minutes=30),
+        # Short retries: with max_active_runs=1 a retrying task holds back the next 5-minute tick,
+        # and due locations are picked up again by the next run anyway
+        "retries": 1,
+        "retry_delay": timedelta(minutes=1),
     },
     tags=["weather", "openweathermap", "postgres"],
 )
@@ -44,88 +56,109 @@ def weather_ingestion_hourly():
     @task
     def get_locations() -> List[Dict[str, Any]]:
         """
-        Pull active locations from dim.location. Returns list of dicts for mapping.
+        Pull active locations that are due for polling from dim.location. Returns list of dicts.
         """
         pg_conninfo = get_postgres_conninfo_from_airflow()
         return pg_fetch_active_locations(pg_conninfo)
 
     @task
-    def extract_and_load_raw(loc: Dict[str, Any]) -> Dict[str, Any]:
+    def chunk_locations(locs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Fetch API data for a single location, store raw JSON to Postgres, return ingestion metadata.
+        Split locations into at most WEATHER_PARALLELISM chunks, one mapped task each.
+        Each chunk also carries the number of chunks in this run, i.e. how many processes share the API quota.
         """
-        api_key = get_api_key_from_env_or_airflow()
+        k = _parallelism()
+        chunks = [c for c in (locs[i::k] for i in range(k)) if c]
+        return [{"locs": c, "workers": len(chunks)} for c in chunks]
+
+    @task
+    def ensure_raw_partitions() -> None:
         pg_conninfo = get_postgres_conninfo_from_airflow()
+        pg_ensure_raw_partitions(pg_conninfo)
 
-        endpoint = Variable.get("OPENWEATHER_ENDPOINT", default_var=DEFAULT_ENDPOINT)
-        units = Variable.get("OPENWEATHER_UNITS", default_var=DEFAULT_UNITS)
+    @task
+    def extract_all_and_load(chunk: Dict[str, Any], data_interval_end=None) -> Dict[str, Any]:
+        """
+        Fetch API data for a chunk of locations concurrently, then store raw JSON and upsert curated
+        observations in one bulk transaction. Returns small counters for downstream checks.
+        data_interval_end (the run's scheduled tick) is injected by Airflow.
+        """
+        locs = chunk["locs"]
+        api_key = get_api_key_from_env_or_airflow()
+        pg_conninfo = get_postgres_conninfo_from_airflow()
 
-        # 1) Extract
-        resp = fetch_current_weather(
-            api_key=api_key,
-            lat=loc["lat"],
-            lon=loc["lon"],
-            units=units,
-            endpoint=endpoint,
-            timeout_seconds=15,
+        endpoint = get_variable("OPENWEATHER_ENDPOINT", DEFAULT_ENDPOINT)
+        units = get_variable("OPENWEATHER_UNITS", DEFAULT_UNITS)
+
+        # Every chunk of this run calls the API at once, each from its own process
+        set_openweather_workers(chunk["workers"])
+
+        # 1) Extract (bounded async fan-out)
+        resps = asyncio.run(
+            fetch_many(
+                api_key=api_key,
+                locs=locs,
+                units=units,
+                endpoint=endpoint,
+                timeout_seconds=15,
+            )
         )
 
-        # 2) Load raw (append)
-        ingestion_id = pg_insert_raw_response(
+        # 2) Load raw (append) + transform/upsert curated from the in-memory payloads
+        result = pg_bulk_insert_raw_and_upsert(
             pg_conninfo=pg_conninfo,
             endpoint=endpoint,
-            location_id=loc["location_id"],
-            location_key=loc["location_key"],
-            request_params=resp["request_params"],
-            http_status=resp["http_status"],
-            data_timestamp=resp.get("data_timestamp"),
-            payload=resp["payload"],
+            locs=locs,
+            resps=resps,
+            scheduled_at=data_interval_end,
         )
 
+        if result["failed"]:
+            log.warning("No curated observation for %d location(s): %s", len(result["failed"]), result["failed"])
+        # Per-location failures are already stored and backed off; only fail the task on a systemic
+        # signal (every request rejected as unauthorized, i.e. a bad or revoked API key)
+        if resps and all(resp["http_status"] == 401 for resp in resps):
+            raise RuntimeError(f"OpenWeather rejected all {len(resps)} request(s) with 401; check OPENWEATHER_API_KEY")
+
+        # Keep XCom compact: counters plus the location ids refresh_latest needs
         return {
-            "location_id": loc["location_id"],
-            "location_key": loc["location_key"],
-            "ingestion_id": ingestion_id,
+            "locations": result["locations"],
+            "curated": result["curated"],
+            "failed": len(result["failed"]),
+            "location_ids": result["location_ids"],
         }
 
     @task
-    def transform_and_upsert_curated(meta: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Read raw payload from the extractor result, normalize, and upsert into mart.weather_observation.
-        """
+    def dq_observations() -> None:
         pg_conninfo = get_postgres_conninfo_from_airflow()
+        pg_dq_observation_freshness(pg_conninfo=pg_conninfo, max_lag_minutes=180)
 
-        # We already have raw payload in extractor output? We stored it in DB.
-        # To keep XCom small, we normalize by reusing payload from DB in load.py upsert function,
-        # but here we'll keep it simple: fetch payload back by ingestion_id inside pg_upsert_weather_observation.
-        rowcount = pg_upsert_weather_observation(
-            pg_conninfo=pg_conninfo,
-            ingestion_id=meta["ingestion_id"],
-        )
-        return {"location_id": meta["location_id"], "rowcount": rowcount}
-
-    @task
-    def dq_checks(curated_results: List[Dict[str, Any]]) -> None:
+    # all_done: one failed chunk must not keep the chunks that loaded from reaching weather_latest.
+    # Failed chunks push no XCom, so only the chunks that returned results are merged.
+    @task(trigger_rule="all_done")
+    def refresh_latest(load_results: List[Dict[str, Any]]) -> None:
         pg_conninfo = get_postgres_conninfo_from_airflow()
-        expected_locations = len(curated_results)
-
-        # Simple check: rowcount totals and freshness
-        pg_dq_freshness_and_rowcount(
-            pg_conninfo=pg_conninfo,
-            expected_locations=expected_locations,
-            max_lag_minutes=180,
-        )
-
-    @task
-    def refresh_latest() -> None:
+        location_ids = [location_id for r in load_results if r for location_id in r["location_ids"]]
+        pg_refresh_latest(pg_conninfo, location_ids)
+
+    @task(trigger_rule="all_done")
+    def dq_latest(load_results: List[Dict[str, Any]]) -> None:
+        load_results = [r for r in load_results if r]
+        if not load_results:
+            log.warning("No chunk loaded in this run; skipping the weather_latest row count check")
+            return
         pg_conninfo = get_postgres_conninfo_from_airflow()
-        pg_refresh_latest(pg_conninfo)
+        # Only locations with a curated observation this run are guaranteed a weather_latest row;
+        # a new location failing its first fetch must not fail the run
+        expected_locations = sum(r["curated"] for r in load_results)
+        pg_dq_latest_rowcount(pg_conninfo=pg_conninfo, expected_locations=expected_locations)
 
     locations = get_locations()
-    raw_metas = extract_and_load_raw.expand(loc=locations)
-    curated = transform_and_upsert_curated.expand(meta=raw_metas)
-    dq_checks(curated)
-    refresh_latest()
+    loaded = extract_all_and_load.expand(chunk=chunk_locations(locations))
+    ensure_raw_partitions() >> loaded
+    # Observation freshness doesn't depend on weather_latest, so it runs alongside the refresh
+    loaded >> dq_observations()
+    refresh_latest(loaded) >> dq_latest(loaded)
 
 
 dag = weather_ingestion_hourly()
\ No newline at end of file
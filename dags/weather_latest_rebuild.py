@@ -0,0 +1,43 @@
+# dags/weather_latest_rebuild.py
+from __future__ import annotations
+
+import logging
+
+from airflow.decorators import dag, task
+from airflow.utils.dates import days_ago
+
+from weather_pipeline.config import get_postgres_conninfo_from_airflow
+from weather_pipeline.load import pg_rebuild_latest
+
+log = logging.getLogger(__name__)
+
+
+@dag(
+    dag_id="weather_latest_rebuild",
+    start_date=days_ago(2),
+    # Backfill/repair only: trigger manually, e.g. after replaying raw rows or loading history.
+    # The hourly DAG keeps weather_latest current incrementally.
+    schedule=None,
+    catchup=False,
+    max_active_runs=1,
+    default_args={
+        "owner": "data-eng",
+        "retries": 0,
+    },
+    tags=["weather", "postgres", "backfill"],
+)
+def weather_latest_rebuild():
+    @task
+    def rebuild_latest() -> int:
+        """
+        Recompute mart.weather_latest from mart.weather_observation for every active location.
+        """
+        pg_conninfo = get_postgres_conninfo_from_airflow()
+        written = pg_rebuild_latest(pg_conninfo)
+        log.info("Rebuilt %d weather_latest row(s)", written)
+        return written
+
+    rebuild_latest()
+
+
+dag = weather_latest_rebuild()
@@ -23,17 +23,24 @@ CREATE TABLE IF NOT EXISTS dim.location (
   lon                DOUBLE PRECISION NOT NULL,
   timezone           TEXT NULL,                    -- optional
   is_active          BOOLEAN NOT NULL DEFAULT TRUE,
+  poll_interval      INTERVAL NOT NULL DEFAULT INTERVAL '1 hour',
+  next_poll_at       TIMESTAMPTZ NULL,             -- NULL = due now; set after each ingestion
   created_at         TIMESTAMPTZ NOT NULL DEFAULT NOW(),
   updated_at         TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
 CREATE INDEX IF NOT EXISTS idx_location_active ON dim.location(is_active);
 
+CREATE INDEX IF NOT EXISTS idx_location_next_poll
+  ON dim.location(next_poll_at) WHERE is_active;
+
 -- --------------------------
 -- Raw: API responses
 -- --------------------------
+-- Append-only, so it is range-partitioned by month on ingested_at: queries that bound
+-- ingested_at only touch the matching partitions, and old months can be detached/dropped.
 CREATE TABLE IF NOT EXISTS raw.weather_api_responses (
-  ingestion_id       UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  ingestion_id       UUID NOT NULL DEFAULT gen_random_uuid(),
   ingested_at        TIMESTAMPTZ NOT NULL DEFAULT NOW(),
   source             TEXT NOT NULL DEFAULT 'openweathermap',
   endpoint           TEXT NOT NULL,                -- e.g. "weather" (current), "onecall"
@@ -42,8 +49,41 @@ CREATE TABLE IF NOT EXISTS raw.weather_api_responses (
   request_params     JSONB NOT NULL,
   http_status        INTEGER NOT NULL,
   data_timestamp     TIMESTAMPTZ NULL,             -- derived from payload dt (if present)
-  payload            JSONB NOT NULL
-);
+  payload            JSONB NOT NULL,
+
+  -- Unique constraints on a partitioned table must include the partition key
+  CONSTRAINT pk_weather_api_responses PRIMARY KEY (ingestion_id, ingested_at)
+) PARTITION BY RANGE (ingested_at);
+
+-- Creates monthly partitions (UTC months) starting at from_month; safe to re-run.
+CREATE OR REPLACE FUNCTION raw.ensure_weather_api_responses_partitions(from_month DATE, months INTEGER)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  m DATE;
+BEGIN
+  FOR i IN 0..months - 1 LOOP
+    m := (date_trunc('month', from_month) + make_interval(months => i))::date;
+    EXECUTE format(
+      'CREATE TABLE IF NOT EXISTS raw.%I PARTITION OF raw.weather_api_responses FOR VALUES FROM (%L) TO (%L)',
+      'weather_api_responses_' || to_char(m, 'YYYYMM'),
+      m::timestamp AT TIME ZONE 'UTC',
+      (m + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC'
+    );
+  END LOOP;
+END;
+$$;
+
+SELECT raw.ensure_weather_api_responses_partitions(CURRENT_DATE, 3);
+
+-- Catch-all so inserts never fail if a month wasn't created ahead of time
+CREATE TABLE IF NOT EXISTS raw.weather_api_responses_default
+  PARTITION OF raw.weather_api_responses DEFAULT;
+
+-- Tiny index for time-range scans over the append-only table
+CREATE INDEX IF NOT EXISTS brin_raw_ingested
+  ON raw.weather_api_responses USING BRIN (ingested_at);
 
 -- Helpful indexes for replay/debug
 CREATE INDEX IF NOT EXISTS idx_raw_responses_loc_ingested
@@ -76,14 +116,22 @@ CREATE TABLE IF NOT EXISTS mart.weather_observation (
   weather_description    TEXT NULL,
 
   ingested_at            TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-  source_ingestion_id    UUID NULL REFERENCES raw.weather_api_responses(ingestion_id),
+  source_ingestion_id    UUID NULL,                -- raw.weather_api_responses.ingestion_id (no FK: raw is partitioned)
 
   -- Idempotency key:
   CONSTRAINT pk_weather_observation PRIMARY KEY (location_id, observed_at)
 );
 
-CREATE INDEX IF NOT EXISTS idx_obs_loc_time_desc
-  ON mart.weather_observation(location_id, observed_at DESC);
+-- Covering index: newest-observation-per-location lookups are index-only
+-- (see sql/migrations/001_obs_latest_covering_index.sql for existing databases)
+CREATE INDEX IF NOT EXISTS idx_obs_loc_time_desc_covering
+  ON mart.weather_observation(location_id, observed_at DESC)
+  INCLUDE (
+    temp_c, feels_like_c, humidity_pct, pressure_hpa,
+    wind_speed_mps, wind_deg, clouds_pct, visibility_m,
+    rain_1h_mm, snow_1h_mm,
+    weather_main, weather_description
+  );
 
 CREATE INDEX IF NOT EXISTS idx_obs_observed_at
   ON mart.weather_observation(observed_at DESC);
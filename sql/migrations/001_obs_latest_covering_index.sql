@@ -0,0 +1,18 @@
+-- sql/migrations/001_obs_latest_covering_index.sql
+-- Covering index for "newest observation per location" lookups (mart.weather_latest refresh/rebuild).
+-- With every weather_latest column in INCLUDE, the per-location
+-- ORDER BY observed_at DESC LIMIT 1 probe is answered by an index-only scan.
+-- It supersedes idx_obs_loc_time_desc, which has the same key columns.
+--
+-- CONCURRENTLY cannot run inside a transaction block: run this file without BEGIN/COMMIT.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_obs_loc_time_desc_covering
+  ON mart.weather_observation(location_id, observed_at DESC)
+  INCLUDE (
+    temp_c, feels_like_c, humidity_pct, pressure_hpa,
+    wind_speed_mps, wind_deg, clouds_pct, visibility_m,
+    rain_1h_mm, snow_1h_mm,
+    weather_main, weather_description
+  );
+
+DROP INDEX CONCURRENTLY IF EXISTS mart.idx_obs_loc_time_desc;
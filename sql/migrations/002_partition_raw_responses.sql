@@ -0,0 +1,90 @@
+-- sql/migrations/002_partition_raw_responses.sql
+-- Convert raw.weather_api_responses to a monthly RANGE partitioned table on ingested_at,
+-- with a BRIN index on ingested_at. Existing rows are copied into the new partitions.
+--
+-- The primary key becomes (ingestion_id, ingested_at), since unique constraints on a partitioned
+-- table must include the partition key. mart.weather_observation.source_ingestion_id can then no
+-- longer be a foreign key; the column is kept as a plain reference.
+--
+-- Takes an ACCESS EXCLUSIVE lock on the raw table for the duration of the copy: run it between DAG runs.
+
+BEGIN;
+
+ALTER TABLE mart.weather_observation
+  DROP CONSTRAINT IF EXISTS weather_observation_source_ingestion_id_fkey;
+
+ALTER TABLE raw.weather_api_responses RENAME TO weather_api_responses_legacy;
+
+CREATE TABLE raw.weather_api_responses (
+  ingestion_id       UUID NOT NULL DEFAULT gen_random_uuid(),
+  ingested_at        TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  source             TEXT NOT NULL DEFAULT 'openweathermap',
+  endpoint           TEXT NOT NULL,
+  location_id        BIGINT NOT NULL REFERENCES dim.location(location_id),
+  location_key       TEXT NOT NULL,
+  request_params     JSONB NOT NULL,
+  http_status        INTEGER NOT NULL,
+  data_timestamp     TIMESTAMPTZ NULL,
+  payload            JSONB NOT NULL,
+
+  CONSTRAINT pk_weather_api_responses PRIMARY KEY (ingestion_id, ingested_at)
+) PARTITION BY RANGE (ingested_at);
+
+CREATE OR REPLACE FUNCTION raw.ensure_weather_api_responses_partitions(from_month DATE, months INTEGER)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  m DATE;
+BEGIN
+  FOR i IN 0..months - 1 LOOP
+    m := (date_trunc('month', from_month) + make_interval(months => i))::date;
+    EXECUTE format(
+      'CREATE TABLE IF NOT EXISTS raw.%I PARTITION OF raw.weather_api_responses FOR VALUES FROM (%L) TO (%L)',
+      'weather_api_responses_' || to_char(m, 'YYYYMM'),
+      m::timestamp AT TIME ZONE 'UTC',
+      (m + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC'
+    );
+  END LOOP;
+END;
+$$;
+
+-- One partition per month from the oldest existing row through two months ahead
+SELECT raw.ensure_weather_api_responses_partitions(
+  start_month,
+  ((EXTRACT(YEAR FROM age(date_trunc('month', CURRENT_DATE), start_month)) * 12
+    + EXTRACT(MONTH FROM age(date_trunc('month', CURRENT_DATE), start_month)))::int + 3)
+)
+FROM (
+  SELECT COALESCE(date_trunc('month', MIN(ingested_at) AT TIME ZONE 'UTC'), date_trunc('month', CURRENT_DATE))::date AS start_month
+  FROM raw.weather_api_responses_legacy
+) s;
+
+CREATE TABLE raw.weather_api_responses_default
+  PARTITION OF raw.weather_api_responses DEFAULT;
+
+INSERT INTO raw.weather_api_responses (
+  ingestion_id, ingested_at, source, endpoint, location_id, location_key,
+  request_params, http_status, data_timestamp, payload
+)
+SELECT
+  ingestion_id, ingested_at, source, endpoint, location_id, location_key,
+  request_params, http_status, data_timestamp, payload
+FROM raw.weather_api_responses_legacy;
+
+-- Frees the legacy index names before they are recreated on the partitioned table
+DROP TABLE raw.weather_api_responses_legacy;
+
+CREATE INDEX idx_raw_responses_loc_ingested
+  ON raw.weather_api_responses(location_id, ingested_at DESC);
+
+CREATE INDEX idx_raw_responses_data_ts
+  ON raw.weather_api_responses(location_id, data_timestamp DESC);
+
+CREATE INDEX idx_raw_responses_payload_gin
+  ON raw.weather_api_responses USING GIN (payload);
+
+CREATE INDEX brin_raw_ingested
+  ON raw.weather_api_responses USING BRIN (ingested_at);
+
+COMMIT;
@@ -0,0 +1,14 @@
+-- sql/migrations/003_location_poll_schedule.sql
+-- Per-location polling schedule for the micro-batch DAG: a location is picked up when
+-- next_poll_at is NULL or in the past, and the loader pushes it forward by poll_interval.
+
+BEGIN;
+
+ALTER TABLE dim.location
+  ADD COLUMN IF NOT EXISTS poll_interval INTERVAL NOT NULL DEFAULT INTERVAL '1 hour',
+  ADD COLUMN IF NOT EXISTS next_poll_at TIMESTAMPTZ NULL;
+
+CREATE INDEX IF NOT EXISTS idx_location_next_poll
+  ON dim.location(next_poll_at) WHERE is_active;
+
+COMMIT;
@@ -1,21 +1,34 @@
 # weather_pipeline/config.py
 from __future__ import annotations
 
+import functools
 import os
 from dataclasses import dataclass
 from typing import Dict
 
 from airflow.hooks.base import BaseHook
+from airflow.models import Variable
 
 DEFAULT_ENDPOINT = "weather"  # OpenWeatherMap "Current Weather Data"
 DEFAULT_UNITS = "metric"
 
 
+@functools.lru_cache(maxsize=None)
+def get_variable(name: str, default: str) -> str:
+    """
+    Airflow Variable lookup, cached for the lifetime of the worker process
+    so repeated task calls don't hit the metadata DB.
+    """
+    return Variable.get(name, default_var=default)
+
+
+@functools.lru_cache(maxsize=1)
 def get_api_key_from_env_or_airflow() -> str:
     """
     Priority:
     1) OPENWEATHER_API_KEY env var
     2) Airflow Connection: openweathermap_api (password field)
+    Cached per worker process.
     """
     env_key = os.getenv("OPENWEATHER_API_KEY")
     if env_key:
@@ -30,9 +43,11 @@ def get_api_key_from_env_or_airflow() -> str:
     )
 
 
+@functools.lru_cache(maxsize=1)
 def get_postgres_conninfo_from_airflow() -> Dict[str, str]:
     """
-    Reads Airflow connection 'postgres_warehouse' and returns a dict suitable for psycopg2.connect(**dict).
+    Reads Airflow connection 'postgres_warehouse' and returns a dict suitable for psycopg.connect(**dict).
+    Cached per worker process; callers must not mutate the returned dict.
     """
     conn = BaseHook.get_connection("postgres_warehouse")
     if not conn.host:
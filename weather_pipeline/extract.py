@@ -1,69 +1,45 @@
 # weather_pipeline/extract.py
 from __future__ import annotations
 
-import time
-from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+import asyncio
+from typing import Any, Dict, List, Optional
 
-import requests
+import aiohttp
+import orjson
 
+from weather_pipeline.ratelimit import OPENWEATHER_BUCKET
 
-def _utc_from_unix(ts: Optional[int]) -> Optional[str]:
-    if ts is None:
-        return None
-    return datetime.fromtimestamp(int(ts), tz=timezone.utc).isoformat()
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
 
 
-def fetch_current_weather(
-    api_key: str,
-    lat: float,
-    lon: float,
-    units: str = "metric",
-    endpoint: str = "weather",
-    timeout_seconds: int = 15,
-    max_retries: int = 3,
-    backoff_seconds: float = 1.0,
+async def _fetch_one(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    url: str,
+    params: Dict[str, Any],
+    max_retries: int,
+    backoff_seconds: float,
 ) -> Dict[str, Any]:
-    """
-    Fetch current weather from OpenWeatherMap.
-    Returns:
-      {
-        "http_status": int,
-        "payload": dict,
-        "request_params": dict,
-        "data_timestamp": iso str | None
-      }
-    Retries on transient errors (429/5xx/network).
-    """
-    base_url = "https://api.openweathermap.org/data/2.5"
-    url = f"{base_url}/{endpoint}"
-
-    params = {
-        "lat": lat,
-        "lon": lon,
-        "appid": api_key,
-        "units": units,
-    }
-
     last_err: Optional[Exception] = None
     for attempt in range(max_retries + 1):
         try:
-            r = requests.get(url, params=params, timeout=timeout_seconds)
-            http_status = r.status_code
+            await OPENWEATHER_BUCKET.acquire_async()
+            async with semaphore:
+                async with session.get(url, params=params) as r:
+                    http_status = r.status
+                    body = await r.read()
 
-            # Retry on rate limit / transient server errors
-            if http_status in (429, 500, 502, 503, 504) and attempt < max_retries:
-                sleep_s = backoff_seconds * (2**attempt)
-                time.sleep(sleep_s)
+            # Retry on rate limit / transient server errors (sleep outside the semaphore)
+            if http_status in _RETRY_STATUSES and attempt < max_retries:
+                await asyncio.sleep(backoff_seconds * (2**attempt))
                 continue
 
-            # Raise for non-OK that we won't retry (e.g., 401)
-            if http_status >= 400 and http_status not in (429, 500, 502, 503, 504):
+            if http_status >= 400 and http_status not in _RETRY_STATUSES:
                 # still capture body for debugging
                 try:
-                    payload = r.json()
+                    payload = orjson.loads(body) if body else {}
                 except Exception:
-                    payload = {"raw_text": r.text}
+                    payload = {"raw_text": body.decode("utf-8", errors="replace")}
                 return {
                     "http_status": http_status,
                     "payload": payload,
@@ -71,11 +47,8 @@ def fetch_current_weather(
                     "data_timestamp": None,
                 }
 
-            payload = r.json()
-            data_ts = None
-            # For current endpoint, "dt" is present
-            if isinstance(payload, dict) and "dt" in payload:
-                data_ts = _utc_from_unix(payload.get("dt"))
+            payload = orjson.loads(body) if body else {}
+            data_ts = payload.get("dt") if isinstance(payload, dict) else None
 
             return {
                 "http_status": http_status,
@@ -84,13 +57,67 @@ def fetch_current_weather(
                 "data_timestamp": data_ts,
             }
 
-        except (requests.Timeout, requests.ConnectionError, requests.HTTPError) as e:
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
             last_err = e
             if attempt < max_retries:
-                sleep_s = backoff_seconds * (2**attempt)
-                time.sleep(sleep_s)
+                await asyncio.sleep(backoff_seconds * (2**attempt))
                 continue
             raise
 
     # Should never hit
-    raise RuntimeError(f"Failed to fetch weather after retries: {last_err}")
\ No newline at end of file
+    raise RuntimeError(f"Failed to fetch weather after retries: {last_err}")
+
+
+async def fetch_many(
+    api_key: str,
+    locs: List[Dict[str, Any]],
+    units: str = "metric",
+    endpoint: str = "weather",
+    concurrency: int = 32,
+    timeout_seconds: int = 15,
+    max_retries: int = 3,
+    backoff_seconds: float = 1.0,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch current weather for many locations concurrently over one keep-alive session.
+    At most `concurrency` requests are in flight at once, paced by OPENWEATHER_BUCKET.
+    Returns one response dict per location, in the order of `locs`:
+      {
+        "http_status": int,
+        "payload": dict,
+        "request_params": dict,
+        "data_timestamp": unix epoch int | None (payload "dt"; pg_insert_raw_response converts it in SQL)
+      }
+    Retries on transient errors (429/5xx/network). A location whose request raised (network error after
+    retries, unreadable body, non-JSON 200) gets http_status 0 and {"error": repr(exc)} as payload.
+    """
+    base_url = "https://api.openweathermap.org/data/2.5"
+    url = f"{base_url}/{endpoint}"
+
+    semaphore = asyncio.Semaphore(concurrency)
+    # Keep-alive pool for api.openweathermap.org: one TLS handshake per pooled connection, reused across
+    # every location and retry in the batch (what the old requests.Session + HTTPAdapter did for sync calls)
+    connector = aiohttp.TCPConnector(limit=concurrency, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+
+    params_list = [{"lat": loc["lat"], "lon": loc["lon"], "appid": api_key, "units": units} for loc in locs]
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        results = await asyncio.gather(
+            *(_fetch_one(session, semaphore, url, params, max_retries, backoff_seconds) for params in params_list),
+            return_exceptions=True,
+        )
+
+    # One location's exhausted retries / bad body must not abort the batch:
+    # report it as a failed response (http_status 0) so the loader stores and backs it off.
+    return [
+        r
+        if not isinstance(r, BaseException)
+        else {
+            "http_status": 0,
+            "payload": {"error": repr(r)},
+            "request_params": params,
+            "data_timestamp": None,
+        }
+        for r, params in zip(results, params_list)
+    ]
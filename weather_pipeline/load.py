@@ -1,38 +1,189 @@
 # weather_pipeline/load.py
+"""
+Postgres access for the weather pipeline (raw, curated and serving layers).
+
+Index requirement: pg_refresh_latest and pg_rebuild_latest fetch each location's newest observation
+with ORDER BY observed_at DESC LIMIT 1. That is only an index-only probe when the covering index
+idx_obs_loc_time_desc_covering on mart.weather_observation(location_id, observed_at DESC) INCLUDE (...)
+exists (sql/ddl.sql, or sql/migrations/001_obs_latest_covering_index.sql on existing databases).
+Without it every probe reads the heap, and the full rebuild degrades to a scan of the whole history.
+"""
 from __future__ import annotations
 
-from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional
+import atexit
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
 
-import psycopg2
-import psycopg2.extras
+import orjson
+import psycopg
+from psycopg.rows import dict_row
+from psycopg.types.json import Jsonb
+from psycopg_pool import ConnectionPool
 
-from weather_pipeline.transform import normalize_current_weather_payload
+from weather_pipeline.transform import normalize_current_weather_payload, normalize_many
 
+log = logging.getLogger(__name__)
 
-def _connect(pg_conninfo: Dict[str, str]):
-    return psycopg2.connect(
-        host=pg_conninfo["host"],
-        port=int(pg_conninfo["port"]),
-        dbname=pg_conninfo["dbname"],
-        user=pg_conninfo["user"],
-        password=pg_conninfo["password"],
-        sslmode=pg_conninfo.get("sslmode", "prefer"),
-    )
+
+def _jsonb(obj: Any) -> Jsonb:
+    """JSONB parameter serialized with orjson instead of stdlib json."""
+    return Jsonb(obj, dumps=orjson.dumps)
+
+
+# One pool per distinct conninfo, shared by every task that runs in this worker process.
+_POOLS: Dict[Tuple[Tuple[str, str], ...], ConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _get_pool(pg_conninfo: Dict[str, str]) -> ConnectionPool:
+    """
+    Lazily build the pool for this conninfo. pool.connection() yields a connection for one
+    transaction (commit on success, rollback on error) and returns it to the pool afterwards.
+    """
+    key = tuple(sorted(pg_conninfo.items()))
+    pool = _POOLS.get(key)
+    if pool is not None:
+        return pool
+
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                kwargs=dict(pg_conninfo),
+                min_size=1,
+                max_size=int(os.getenv("PG_POOL_MAX", "8")),
+                max_idle=300,
+                open=True,
+            )
+            _POOLS[key] = pool
+        return pool
+
+
+@atexit.register
+def _close_pools() -> None:
+    with _POOLS_LOCK:
+        for pool in _POOLS.values():
+            pool.close()
+        _POOLS.clear()
 
 
 def pg_fetch_active_locations(pg_conninfo: Dict[str, str]) -> List[Dict[str, Any]]:
+    """
+    Active locations that are due for polling (next_poll_at unset or in the past).
+    """
     sql = """
       SELECT location_id, location_key, lat, lon
       FROM dim.location
       WHERE is_active = TRUE
+        AND (next_poll_at IS NULL OR next_poll_at <= NOW())
       ORDER BY location_id;
     """
-    with _connect(pg_conninfo) as conn:
-        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+    with _get_pool(pg_conninfo).connection() as conn:
+        with conn.cursor(row_factory=dict_row) as cur:
             cur.execute(sql)
-            rows = cur.fetchall()
-            return [dict(r) for r in rows]
+            return cur.fetchall()
+
+
+def pg_ensure_raw_partitions(pg_conninfo: Dict[str, str], months_ahead: int = 2) -> None:
+    """
+    Make sure monthly partitions of raw.weather_api_responses exist for the current month
+    and the next months_ahead - 1 months, so rows don't land in the default partition.
+    """
+    with _get_pool(pg_conninfo).connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT raw.ensure_weather_api_responses_partitions(CURRENT_DATE, %s);", (months_ahead,))
+
+
+_UPSERT_OBSERVATION_SQL = """
+  INSERT INTO mart.weather_observation (
+    location_id, observed_at,
+    temp_c, feels_like_c, humidity_pct, pressure_hpa,
+    wind_speed_mps, wind_deg, clouds_pct, visibility_m,
+    rain_1h_mm, snow_1h_mm,
+    weather_main, weather_description,
+    ingested_at, source_ingestion_id
+  )
+  VALUES (
+    %s, %s,
+    %s, %s, %s, %s,
+    %s, %s, %s, %s,
+    %s, %s,
+    %s, %s,
+    %s, %s
+  )
+  ON CONFLICT (location_id, observed_at) DO UPDATE SET
+    temp_c              = EXCLUDED.temp_c,
+    feels_like_c        = EXCLUDED.feels_like_c,
+    humidity_pct        = EXCLUDED.humidity_pct,
+    pressure_hpa        = EXCLUDED.pressure_hpa,
+    wind_speed_mps      = EXCLUDED.wind_speed_mps,
+    wind_deg            = EXCLUDED.wind_deg,
+    clouds_pct          = EXCLUDED.clouds_pct,
+    visibility_m        = EXCLUDED.visibility_m,
+    rain_1h_mm          = EXCLUDED.rain_1h_mm,
+    snow_1h_mm          = EXCLUDED.snow_1h_mm,
+    weather_main        = EXCLUDED.weather_main,
+    weather_description = EXCLUDED.weather_description,
+    ingested_at         = EXCLUDED.ingested_at,
+    source_ingestion_id = EXCLUDED.source_ingestion_id;
+"""
+
+
+_INSERT_RAW_SQL = """
+  INSERT INTO raw.weather_api_responses
+    (endpoint, location_id, location_key, request_params, http_status, data_timestamp, payload)
+  VALUES
+    (%s, %s, %s, %s, %s, to_timestamp(%s::double precision), %s)
+  RETURNING ingestion_id;
+"""
+
+_COPY_RAW_SQL = """
+  COPY raw.weather_api_responses
+    (ingestion_id, ingested_at, endpoint, location_id, location_key,
+     request_params, http_status, data_timestamp, payload)
+  FROM STDIN
+"""
+
+
+# Successful locations wait a full poll_interval; failed ones are retried after a quarter of it.
+# Anchored on the run's scheduled time, not NOW(): commit latency would otherwise push each cycle
+# past the tick that should pick it up (e.g. 1h becomes 65 min on a 5-minute schedule).
+_SCHEDULE_NEXT_POLL_SQL = """
+  UPDATE dim.location
+  SET next_poll_at = %s::timestamptz + CASE WHEN location_id = ANY(%s::bigint[]) THEN poll_interval ELSE poll_interval / 4 END
+  WHERE location_id = ANY(%s::bigint[]);
+"""
+
+
+def _observation_params(
+    location_id: int,
+    normalized: Dict[str, Any],
+    ingested_at: datetime,
+    ingestion_id: str,
+) -> Tuple[Any, ...]:
+    """Positional parameters for _UPSERT_OBSERVATION_SQL, in column order."""
+    return (
+        location_id,
+        normalized["observed_at"],
+        normalized["temp_c"],
+        normalized["feels_like_c"],
+        normalized["humidity_pct"],
+        normalized["pressure_hpa"],
+        normalized["wind_speed_mps"],
+        normalized["wind_deg"],
+        normalized["clouds_pct"],
+        normalized["visibility_m"],
+        normalized["rain_1h_mm"],
+        normalized["snow_1h_mm"],
+        normalized["weather_main"],
+        normalized["weather_description"],
+        ingested_at,
+        ingestion_id,
+    )
 
 
 def pg_insert_raw_response(
@@ -42,64 +193,218 @@ def pg_insert_raw_response(
     location_key: str,
     request_params: Dict[str, Any],
     http_status: int,
-    data_timestamp: Optional[str],
+    data_timestamp: Optional[int],
     payload: Dict[str, Any],
 ) -> str:
-    sql = """
-      INSERT INTO raw.weather_api_responses
-        (endpoint, location_id, location_key, request_params, http_status, data_timestamp, payload)
-      VALUES
-        (%s, %s, %s, %s::jsonb, %s, %s::timestamptz, %s::jsonb)
-      RETURNING ingestion_id;
     """
-    with _connect(pg_conninfo) as conn:
+    Single-row fallback to the COPY in pg_bulk_insert_raw_and_upsert, for storing one response
+    on its own (e.g. when retrying a single location). Returns the generated ingestion_id.
+    """
+    with _get_pool(pg_conninfo).connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                sql,
+                _INSERT_RAW_SQL,
                 (
                     endpoint,
                     location_id,
                     location_key,
-                    psycopg2.extras.Json(request_params),
+                    _jsonb(request_params),
                     http_status,
                     data_timestamp,
-                    psycopg2.extras.Json(payload),
+                    _jsonb(payload),
                 ),
             )
-            ingestion_id = cur.fetchone()[0]
-            return str(ingestion_id)
+            return str(cur.fetchone()[0])
+
+
+def pg_bulk_insert_raw_and_upsert(
+    pg_conninfo: Dict[str, str],
+    endpoint: str,
+    locs: List[Dict[str, Any]],
+    resps: List[Dict[str, Any]],
+    scheduled_at: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Store raw API responses and upsert their curated observations: raw is streamed with one COPY,
+    then one bulk curated upsert runs for the OK ones, and every location's next_poll_at is
+    pushed forward, all in a single transaction.
+    `resps[i]` is the API response for `locs[i]`.
+    next_poll_at is computed from `scheduled_at` (the DAG run's scheduled tick; defaults to now).
+    Returns {"locations": int, "curated": int, "failed": [location_key, ...],
+             "location_ids": [location_id, ...]} (locations with an upserted observation).
+    """
+    # ids/timestamps are assigned client-side since COPY cannot RETURN them
+    ingested_at = datetime.now(timezone.utc)
+    raw_rows: List[Tuple[Any, ...]] = []
+    failed: List[str] = []
+    rows: List[Tuple[Any, ...]] = []
+
+    # Non-OK responses (incl. http_status 0 = request raised) normalize to None,
+    # same as payloads without an observation time
+    normalized_all = normalize_many([resp["payload"] if 200 <= resp["http_status"] < 400 else {} for resp in resps])
+
+    for loc, resp, normalized in zip(locs, resps, normalized_all):
+        ingestion_id = str(uuid.uuid4())
+        raw_rows.append(
+            (
+                ingestion_id,
+                ingested_at,
+                endpoint,
+                loc["location_id"],
+                loc["location_key"],
+                _jsonb(resp["request_params"]),
+                resp["http_status"],
+                # Same instant as resp["data_timestamp"]: COPY can't apply to_timestamp() to the epoch,
+                # so reuse the datetime normalize_many already built from the payload's "dt"
+                normalized["observed_at"] if normalized is not None else None,
+                _jsonb(resp["payload"]),
+            )
+        )
+
+        if normalized is None:
+            failed.append(loc["location_key"])
+            continue
+        rows.append(_observation_params(loc["location_id"], normalized, ingested_at, ingestion_id))
+
+    with _get_pool(pg_conninfo).connection() as conn:
+        with conn.cursor() as cur:
+            with cur.copy(_COPY_RAW_SQL) as copy:
+                for raw_row in raw_rows:
+                    copy.write_row(raw_row)
+            rejected = _bulk_upsert_observations(conn, cur, rows)
+            if rejected:
+                rejected_ids = {r[0] for r in rejected}
+                failed.extend(loc["location_key"] for loc in locs if loc["location_id"] in rejected_ids)
+                rows = [r for r in rows if r[0] not in rejected_ids]
+            cur.execute(
+                _SCHEDULE_NEXT_POLL_SQL,
+                (scheduled_at or ingested_at, [r[0] for r in rows], [loc["location_id"] for loc in locs]),
+            )
+
+    return {
+        "locations": len(locs),
+        "curated": len(rows),
+        "failed": failed,
+        "location_ids": [r[0] for r in rows],
+    }
 
 
-def pg_upsert_weather_observation(pg_conninfo: Dict[str, str], ingestion_id: str) -> int:
+def _bulk_upsert_observations(
+    conn,
+    cur,
+    rows: List[Tuple[Any, ...]],
+    savepoint_every: int = 100,
+) -> List[Tuple[Any, ...]]:
+    """
+    Upsert rows inside the caller's transaction (one commit, one WAL flush for the whole batch).
+    Each slice of savepoint_every rows runs under its own SAVEPOINT. If a slice fails, it is
+    retried row by row, each row under its own SAVEPOINT, so only the offending rows are lost.
+    Returns the rows that were rolled back.
+    """
+    rejected: List[Tuple[Any, ...]] = []
+    for start in range(0, len(rows), savepoint_every):
+        chunk = rows[start : start + savepoint_every]
+        try:
+            with conn.transaction():
+                # Pipeline mode sends every upsert without waiting for each result.
+                # prepare=True makes it a server-side prepared statement, parsed/planned once per pooled connection.
+                with conn.pipeline():
+                    for row in chunk:
+                        cur.execute(_UPSERT_OBSERVATION_SQL, row, prepare=True)
+        except psycopg.Error:
+            log.warning("Upsert of %d observation(s) starting at row %d failed; retrying row by row", len(chunk), start)
+            for row in chunk:
+                try:
+                    with conn.transaction():
+                        cur.execute(_UPSERT_OBSERVATION_SQL, row, prepare=True)
+                except psycopg.Error:
+                    log.exception("Rolled back upsert of observation for location_id=%s", row[0])
+                    rejected.append(row)
+    return rejected
+
+
+def pg_upsert_weather_observation(
+    pg_conninfo: Dict[str, str],
+    ingestion_id: str,
+    lookback_hours: Optional[int] = None,
+) -> int:
     """
     Loads curated observation from raw payload referenced by ingestion_id.
+    This is the replay entry point for raw rows (e.g. after fixing normalization);
+    the DAG upserts from the in-memory payload via pg_bulk_insert_raw_and_upsert instead.
+    By default every raw partition is searched. When the row is known to be recent, pass
+    lookback_hours so the planner prunes to the current partition(s).
     Upsert is keyed by (location_id, observed_at).
     Returns affected rowcount (1 typically).
     """
     fetch_sql = """
       SELECT location_id, payload, ingested_at
       FROM raw.weather_api_responses
-      WHERE ingestion_id = %s;
+      WHERE ingestion_id = %s
+    """
+    fetch_params: Tuple[Any, ...] = (ingestion_id,)
+    if lookback_hours is not None:
+        fetch_sql += "  AND ingested_at >= NOW() - make_interval(hours => %s)\n"
+        fetch_params += (lookback_hours,)
+
+    with _get_pool(pg_conninfo).connection() as conn:
+        with conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(fetch_sql, fetch_params)
+            row = cur.fetchone()
+            if not row:
+                window = f" within the last {lookback_hours}h" if lookback_hours is not None else ""
+                raise RuntimeError(f"No raw row found for ingestion_id={ingestion_id}{window}")
+
+            normalized = normalize_current_weather_payload(row["payload"])
+            params = _observation_params(row["location_id"], normalized, row["ingested_at"], ingestion_id)
+
+            cur.execute(_UPSERT_OBSERVATION_SQL, params, prepare=True)
+            # rowcount for INSERT..ON CONFLICT can be 1 (insert/update)
+            return cur.rowcount
+
+
+def pg_refresh_latest(pg_conninfo: Dict[str, str], location_ids: List[int]) -> int:
+    """
+    Incrementally merge the newest observation of each given location (typically the ones
+    just upserted) into mart.weather_latest. Each location is one LATERAL probe on
+    idx_obs_loc_time_desc_covering, so no full-history scan is needed.
+    A location's row is only replaced when the incoming observation is not older than it.
+    Returns the number of latest rows written.
     """
+    if not location_ids:
+        return 0
 
-    upsert_sql = """
-      INSERT INTO mart.weather_observation (
+    sql = """
+      INSERT INTO mart.weather_latest (
         location_id, observed_at,
         temp_c, feels_like_c, humidity_pct, pressure_hpa,
         wind_speed_mps, wind_deg, clouds_pct, visibility_m,
         rain_1h_mm, snow_1h_mm,
         weather_main, weather_description,
-        ingested_at, source_ingestion_id
-      )
-      VALUES (
-        %(location_id)s, %(observed_at)s,
-        %(temp_c)s, %(feels_like_c)s, %(humidity_pct)s, %(pressure_hpa)s,
-        %(wind_speed_mps)s, %(wind_deg)s, %(clouds_pct)s, %(visibility_m)s,
-        %(rain_1h_mm)s, %(snow_1h_mm)s,
-        %(weather_main)s, %(weather_description)s,
-        %(ingested_at)s, %(source_ingestion_id)s
+        updated_at
       )
-      ON CONFLICT (location_id, observed_at) DO UPDATE SET
+      SELECT
+        n.location_id, o.observed_at,
+        o.temp_c, o.feels_like_c, o.humidity_pct, o.pressure_hpa,
+        o.wind_speed_mps, o.wind_deg, o.clouds_pct, o.visibility_m,
+        o.rain_1h_mm, o.snow_1h_mm,
+        o.weather_main, o.weather_description,
+        NOW() AS updated_at
+      FROM unnest(%s::bigint[]) AS n(location_id)
+      CROSS JOIN LATERAL (
+        SELECT
+          observed_at,
+          temp_c, feels_like_c, humidity_pct, pressure_hpa,
+          wind_speed_mps, wind_deg, clouds_pct, visibility_m,
+          rain_1h_mm, snow_1h_mm,
+          weather_main, weather_description
+        FROM mart.weather_observation
+        WHERE location_id = n.location_id
+        ORDER BY observed_at DESC
+        LIMIT 1
+      ) o
+      ON CONFLICT (location_id) DO UPDATE SET
+        observed_at         = EXCLUDED.observed_at,
         temp_c              = EXCLUDED.temp_c,
         feels_like_c        = EXCLUDED.feels_like_c,
         humidity_pct        = EXCLUDED.humidity_pct,
@@ -112,50 +417,23 @@ def pg_upsert_weather_observation(pg_conninfo: Dict[str, str], ingestion_id: str
         snow_1h_mm          = EXCLUDED.snow_1h_mm,
         weather_main        = EXCLUDED.weather_main,
         weather_description = EXCLUDED.weather_description,
-        ingested_at         = EXCLUDED.ingested_at,
-        source_ingestion_id = EXCLUDED.source_ingestion_id;
+        updated_at          = EXCLUDED.updated_at
+      WHERE mart.weather_latest.observed_at <= EXCLUDED.observed_at;
     """
-
-    with _connect(pg_conninfo) as conn:
-        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-            cur.execute(fetch_sql, (ingestion_id,))
-            row = cur.fetchone()
-            if not row:
-                raise RuntimeError(f"No raw row found for ingestion_id={ingestion_id}")
-
-            location_id = row["location_id"]
-            payload = row["payload"]
-            ingested_at = row["ingested_at"]
-
-            normalized = normalize_current_weather_payload(payload)
-            params = {
-                "location_id": location_id,
-                "observed_at": normalized["observed_at"],
-                "temp_c": normalized["temp_c"],
-                "feels_like_c": normalized["feels_like_c"],
-                "humidity_pct": normalized["humidity_pct"],
-                "pressure_hpa": normalized["pressure_hpa"],
-                "wind_speed_mps": normalized["wind_speed_mps"],
-                "wind_deg": normalized["wind_deg"],
-                "clouds_pct": normalized["clouds_pct"],
-                "visibility_m": normalized["visibility_m"],
-                "rain_1h_mm": normalized["rain_1h_mm"],
-                "snow_1h_mm": normalized["snow_1h_mm"],
-                "weather_main": normalized["weather_main"],
-                "weather_description": normalized["weather_description"],
-                "ingested_at": ingested_at,
-                "source_ingestion_id": ingestion_id,
-            }
-
-            cur.execute(upsert_sql, params)
-            # psycopg2 rowcount for INSERT..ON CONFLICT can be 1 (insert/update)
+    with _get_pool(pg_conninfo).connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, (location_ids,))
             return cur.rowcount
 
 
-def pg_refresh_latest(pg_conninfo: Dict[str, str]) -> None:
+def pg_rebuild_latest(pg_conninfo: Dict[str, str]) -> int:
     """
-    Rebuild/refresh mart.weather_latest using the newest observation per location.
-    For moderate data sizes, this is fine; at scale, do incremental updates instead.
+    Full recompute of mart.weather_latest for all active locations, for backfills/repairs
+    (run by the manually triggered weather_latest_rebuild DAG).
+    Runs as one LATERAL "newest observation" probe per location; with the covering index
+    idx_obs_loc_time_desc_covering (sql/migrations/001_obs_latest_covering_index.sql) each probe
+    is an index-only scan instead of a scan over the whole observation history.
+    Returns the number of latest rows written.
     """
     sql = """
       INSERT INTO mart.weather_latest (
@@ -166,15 +444,27 @@ def pg_refresh_latest(pg_conninfo: Dict[str, str]) -> None:
         weather_main, weather_description,
         updated_at
       )
-      SELECT DISTINCT ON (location_id)
-        location_id, observed_at,
-        temp_c, feels_like_c, humidity_pct, pressure_hpa,
-        wind_speed_mps, wind_deg, clouds_pct, visibility_m,
-        rain_1h_mm, snow_1h_mm,
-        weather_main, weather_description,
+      SELECT
+        l.location_id, o.observed_at,
+        o.temp_c, o.feels_like_c, o.humidity_pct, o.pressure_hpa,
+        o.wind_speed_mps, o.wind_deg, o.clouds_pct, o.visibility_m,
+        o.rain_1h_mm, o.snow_1h_mm,
+        o.weather_main, o.weather_description,
         NOW() AS updated_at
-      FROM mart.weather_observation
-      ORDER BY location_id, observed_at DESC
+      FROM dim.location l
+      CROSS JOIN LATERAL (
+        SELECT
+          observed_at,
+          temp_c, feels_like_c, humidity_pct, pressure_hpa,
+          wind_speed_mps, wind_deg, clouds_pct, visibility_m,
+          rain_1h_mm, snow_1h_mm,
+          weather_main, weather_description
+        FROM mart.weather_observation
+        WHERE location_id = l.location_id
+        ORDER BY observed_at DESC
+        LIMIT 1
+      ) o
+      WHERE l.is_active = TRUE
       ON CONFLICT (location_id) DO UPDATE SET
         observed_at         = EXCLUDED.observed_at,
         temp_c              = EXCLUDED.temp_c,
@@ -191,39 +481,46 @@ def pg_refresh_latest(pg_conninfo: Dict[str, str]) -> None:
         weather_description = EXCLUDED.weather_description,
         updated_at          = EXCLUDED.updated_at;
     """
-    with _connect(pg_conninfo) as conn:
+    with _get_pool(pg_conninfo).connection() as conn:
         with conn.cursor() as cur:
             cur.execute(sql)
+            return cur.rowcount
 
 
-def pg_dq_freshness_and_rowcount(
-    pg_conninfo: Dict[str, str],
-    expected_locations: int,
-    max_lag_minutes: int = 180,
-) -> None:
+def pg_dq_observation_freshness(pg_conninfo: Dict[str, str], max_lag_minutes: int = 180) -> None:
+    """
+    Checks max(observed_at) in mart.weather_observation is within max_lag_minutes of now.
+    Reads only the observation table, so it can run while weather_latest is being refreshed.
     """
-    Basic checks:
-      - latest table has at least expected_locations rows
-      - max(observed_at) within max_lag_minutes of now
+    sql = """
+      WITH obs AS (SELECT MAX(observed_at) AS max_observed FROM mart.weather_observation)
+      SELECT
+        obs.max_observed,
+        NOW() - obs.max_observed AS lag,
+        NOW() - obs.max_observed > make_interval(mins => %s) AS is_stale
+      FROM obs;
     """
-    count_sql = "SELECT COUNT(*) FROM mart.weather_latest;"
-    max_ts_sql = "SELECT MAX(observed_at) FROM mart.weather_observation;"
 
-    with _connect(pg_conninfo) as conn:
+    with _get_pool(pg_conninfo).connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(count_sql)
-            latest_count = cur.fetchone()[0]
-
-            cur.execute(max_ts_sql)
-            max_observed = cur.fetchone()[0]
-
-    if latest_count < max(1, expected_locations):
-        raise ValueError(f"DQ failed: mart.weather_latest has {latest_count} rows, expected >= {expected_locations}")
+            cur.execute(sql, (max_lag_minutes,))
+            max_observed, lag, is_stale = cur.fetchone()
 
     if max_observed is None:
         raise ValueError("DQ failed: no observations in mart.weather_observation")
 
-    now_utc = datetime.now(timezone.utc)
-    lag = now_utc - max_observed
-    if lag > timedelta(minutes=max_lag_minutes):
-        raise ValueError(f"DQ failed: data is stale. max_observed={max_observed}, lag={lag}")
\ No newline at end of file
+    if is_stale:
+        raise ValueError(f"DQ failed: data is stale. max_observed={max_observed}, lag={lag}")
+
+
+def pg_dq_latest_rowcount(pg_conninfo: Dict[str, str], expected_locations: int) -> None:
+    """
+    Checks mart.weather_latest has at least expected_locations rows (run after the refresh).
+    """
+    with _get_pool(pg_conninfo).connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM mart.weather_latest;")
+            latest_count = cur.fetchone()[0]
+
+    if latest_count < max(1, expected_locations):
+        raise ValueError(f"DQ failed: mart.weather_latest has {latest_count} rows, expected >= {expected_locations}")
@@ -0,0 +1,55 @@
+# weather_pipeline/ratelimit.py
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: holds up to `capacity` tokens, refilled at `rate` tokens/second.
+    acquire_async() waits (without blocking the event loop) until a token is available.
+    """
+
+    def __init__(self, capacity: float, rate: float) -> None:
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token if one is available; otherwise return seconds until the next one."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def reconfigure(self, capacity: float, rate: float) -> None:
+        with self._lock:
+            self.capacity = capacity
+            self.rate = rate
+            self.tokens = min(self.tokens, capacity)
+
+    async def acquire_async(self) -> None:
+        while (wait := self._reserve()) > 0:
+            await asyncio.sleep(wait)
+
+
+# OpenWeatherMap budget (free tier: 60 calls/minute). OPENWEATHER_RATE_PER_MIN is the total quota
+# for the whole DAG run; each mapped task runs in its own process, so the bucket in every process
+# gets 1/workers of it (see set_openweather_workers), burst included.
+_OPENWEATHER_RATE_PER_MIN = float(os.getenv("OPENWEATHER_RATE_PER_MIN", "60"))
+OPENWEATHER_BUCKET = TokenBucket(capacity=_OPENWEATHER_RATE_PER_MIN, rate=_OPENWEATHER_RATE_PER_MIN / 60)
+
+
+def set_openweather_workers(workers: int) -> None:
+    """Share the OpenWeather quota between `workers` processes calling the API concurrently."""
+    per_worker = _OPENWEATHER_RATE_PER_MIN / max(1, workers)
+    OPENWEATHER_BUCKET.reconfigure(capacity=max(1.0, per_worker), rate=per_worker / 60)
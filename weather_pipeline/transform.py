@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 
 def _utc_dt_from_unix(ts: Optional[int]) -> Optional[datetime]:
@@ -11,23 +11,19 @@ def _utc_dt_from_unix(ts: Optional[int]) -> Optional[datetime]:
     return datetime.fromtimestamp(int(ts), tz=timezone.utc)
 
 
-def _safe_get(d: Dict[str, Any], *keys, default=None):
-    cur: Any = d
-    for k in keys:
-        if not isinstance(cur, dict) or k not in cur:
-            return default
-        cur = cur[k]
-    return cur
-
-
-def normalize_current_weather_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+def _normalize_checked(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """
-    Normalize OpenWeatherMap 'current weather' payload to curated schema fields.
-    Returns dict matching mart.weather_observation columns (except location_id and ingestion id).
+    Defensive normalization for payloads that don't match the usual OWM shape.
+    Returns None when the payload is not a dict or has no usable 'dt'.
     """
-    observed_dt = _utc_dt_from_unix(payload.get("dt"))
+    if not isinstance(payload, dict):
+        return None
+    try:
+        observed_dt = _utc_dt_from_unix(payload.get("dt"))
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
     if observed_dt is None:
-        raise ValueError("Payload missing 'dt' (observation time)")
+        return None
 
     main = payload.get("main", {}) if isinstance(payload.get("main"), dict) else {}
     wind = payload.get("wind", {}) if isinstance(payload.get("wind"), dict) else {}
@@ -37,10 +33,12 @@ def normalize_current_weather_payload(payload: Dict[str, Any]) -> Dict[str, Any]
         weather0 = payload["weather"][0] if isinstance(payload["weather"][0], dict) else None
 
     # rain/snow sometimes nested like {"1h": mm}
-    rain_1h = _safe_get(payload, "rain", "1h", default=None)
-    snow_1h = _safe_get(payload, "snow", "1h", default=None)
+    rain = payload.get("rain")
+    snow = payload.get("snow")
+    rain_1h = rain.get("1h") if isinstance(rain, dict) else None
+    snow_1h = snow.get("1h") if isinstance(snow, dict) else None
 
-    normalized = {
+    return {
         "observed_at": observed_dt,  # datetime
         "temp_c": main.get("temp"),
         "feels_like_c": main.get("feels_like"),
@@ -56,4 +54,58 @@ def normalize_current_weather_payload(payload: Dict[str, Any]) -> Dict[str, Any]
         "weather_description": weather0.get("description") if weather0 else None,
     }
 
-    return normalized
\ No newline at end of file
+
+def normalize_many(payloads: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Normalize a batch of OpenWeatherMap 'current weather' payloads to curated schema fields.
+    Returns one dict per payload (same order), or None for payloads without a usable 'dt'
+    (missing, non-numeric) or that aren't dicts; a bad payload never raises.
+    The loop trusts the documented OWM shape; a payload that doesn't fit falls back
+    to the defensive per-row path.
+    """
+    out: List[Optional[Dict[str, Any]]] = []
+    append = out.append
+    fromtimestamp = datetime.fromtimestamp
+    utc = timezone.utc
+
+    for p in payloads:
+        try:
+            dt = p.get("dt")
+            if dt is None:
+                append(None)
+                continue
+            main_get = (p.get("main") or {}).get
+            wind_get = (p.get("wind") or {}).get
+            w_get = (p.get("weather") or [{}])[0].get
+            append(
+                {
+                    "observed_at": fromtimestamp(int(dt), tz=utc),
+                    "temp_c": main_get("temp"),
+                    "feels_like_c": main_get("feels_like"),
+                    "humidity_pct": main_get("humidity"),
+                    "pressure_hpa": main_get("pressure"),
+                    "wind_speed_mps": wind_get("speed"),
+                    "wind_deg": wind_get("deg"),
+                    "clouds_pct": (p.get("clouds") or {}).get("all"),
+                    "visibility_m": p.get("visibility"),
+                    "rain_1h_mm": (p.get("rain") or {}).get("1h"),
+                    "snow_1h_mm": (p.get("snow") or {}).get("1h"),
+                    "weather_main": w_get("main"),
+                    "weather_description": w_get("description"),
+                }
+            )
+        except (AttributeError, TypeError, IndexError, KeyError, ValueError, OverflowError, OSError):
+            append(_normalize_checked(p))
+
+    return out
+
+
+def normalize_current_weather_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize OpenWeatherMap 'current weather' payload to curated schema fields.
+    Returns dict matching mart.weather_observation columns (except location_id and ingestion id).
+    """
+    normalized = normalize_many([payload])[0]
+    if normalized is None:
+        raise ValueError("Payload missing or invalid 'dt' (observation time)")
+    return normalized